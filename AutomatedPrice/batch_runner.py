@@ -0,0 +1,199 @@
+"""Running many price updates in one go.
+
+A manifest lists every price update job, with the site, the price increase file, the master file and optionally their
+columns and row numbers. The slow part of each job, reading both files and matching the SKU numbers, runs in its own
+worker process. The updates are then written in this process, and every job that updates the same master file is
+merged, so each master file is only loaded and saved once.
+
+Example manifest::
+
+    [
+        {"site": "PSC", "price_increase": "PriceIncreases/Daubert.xlsx", "master": "MasterSheets/products.xlsx"},
+        {"site": "PSC", "price_increase": "PriceIncreases/Shell.xlsx", "price_increase_columns": ["A", "C"],
+         "master": "MasterSheets/products.xlsx"}
+    ]
+
+Run it with ``python batch_runner.py manifest.json``.
+"""
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from openpyxl.utils import column_index_from_string
+
+from main import (check_which_products_exist, collect_information, configure_logging, create_old_prod_dict,
+                  high_light_price_increase, update_price)
+from master_layout import parse_master_layout
+from sheet_profile import profile_sheet
+from workbook_session import WorkbookSession
+
+log = logging.getLogger("AutomatedPrice.batch")
+
+
+class PriceUpdateJob:
+    """
+    One price increase file to apply to one master file.
+
+    Any of the columns or indices that are None get found with 'profile_sheet'.
+    """
+
+    def __init__(self, site, price_increase, master, price_increase_columns=None, price_increase_indices=None,
+                 master_columns=None, master_indices=None):
+        self.site = site
+        self.price_increase = price_increase
+        self.master = master
+        self.price_increase_columns = price_increase_columns
+        self.price_increase_indices = price_increase_indices
+        self.master_columns = master_columns
+        self.master_indices = master_indices
+
+    def __repr__(self):
+        return "PriceUpdateJob(" + self.site + ", " + self.price_increase + " -> " + self.master + ")"
+
+
+class JobResult:
+    """
+    What a worker found for a job: the matched SKU numbers and prices, the rows and columns that were used, and how long
+    each stage took in seconds. The price increase columns are letters and the master columns are indices in a row,
+    starting from zero.
+    """
+
+    def __init__(self, job, matched, price_increase_columns, price_increase_indices, master_indices,
+                 master_column_indices, old_layout_end, timings):
+        self.job = job
+        self.matched = matched
+        self.price_increase_columns = price_increase_columns
+        self.price_increase_indices = price_increase_indices
+        self.master_indices = master_indices
+        self.master_column_indices = master_column_indices
+        self.old_layout_end = old_layout_end
+        self.timings = timings
+
+
+def load_manifest(manifest_name):
+    """
+    Load the jobs of a manifest
+
+    :param manifest_name: Represents the name of the json manifest, which holds a list of jobs.
+    :return: This will return a list of PriceUpdateJob.
+    """
+    with open(manifest_name) as manifest:
+        return [PriceUpdateJob(**job) for job in json.load(manifest)]
+
+
+def collect_job(job):
+    """
+    Collect and match a job
+
+    Runs in a worker process. Both files are streamed in read only mode, since nothing gets written here.
+
+    :param job: Represents the PriceUpdateJob.
+    :return: This will return a JobResult.
+    """
+    timings = {}
+    start = time.perf_counter()
+    with WorkbookSession(read_only=True) as source:
+        increase_columns = job.price_increase_columns
+        increase_indices = job.price_increase_indices
+        if increase_columns is None or increase_indices is None:
+            increase_profile = profile_sheet(source.worksheet(job.price_increase, 'info'), columns=increase_columns)
+            increase_columns = increase_columns or increase_profile.columns
+            increase_indices = increase_indices or increase_profile.indices
+        master_profile = profile_sheet(source.worksheet(job.master, 'info'), columns=job.master_columns)
+        master_columns = master_profile.columns
+        master_indices = job.master_indices or master_profile.indices
+
+        price_changes = collect_information(job.price_increase, 'info', increase_columns, increase_indices[0],
+                                            increase_indices[1], source)
+        compare_information = collect_information(job.master, 'info', master_columns, master_indices[0],
+                                                  master_indices[1], source)
+    timings["collect"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = check_which_products_exist(price_changes, compare_information)
+    timings["match"] = time.perf_counter() - start
+    return JobResult(job, matched, increase_columns, increase_indices, master_indices, master_profile.column_indices,
+                     master_profile.old_layout_end, timings)
+
+
+def merge_updates(results):
+    """
+    Merge the matched SKU numbers of every job by the master file they update.
+
+    When more than one job has a new price for the same SKU number, the job that comes later in the manifest wins.
+
+    :param results: Represents the list of JobResult, in the order of the manifest.
+    :return: This will return a dictionary of master file names and a tuple of the list of JobResult for that master and
+    the merged list of matched SKU numbers and prices.
+    """
+    by_master = {}
+    for result in results:
+        by_master.setdefault(result.job.master, []).append(result)
+    merged = {}
+    for master, master_results in by_master.items():
+        sites = {result.job.site for result in master_results}
+        if len(sites) > 1:
+            raise ValueError("The master file " + master + " is used by more than one site: " + str(sorted(sites)))
+        latest = {}
+        for result in master_results:
+            latest.update((i[0], i) for i in result.matched)
+        merged[master] = (master_results, list(latest.values()))
+    return merged
+
+
+def run_batch(jobs, workers=None):
+    """
+    Run every job of a batch
+
+    :param jobs: Represents the list of PriceUpdateJob.
+    :param workers: Represents how many worker processes to use, one for each processor if None.
+    :return: This will return the list of JobResult, with the timings of the highlight and update stages added.
+    """
+    batch_start = time.perf_counter()
+    verbosity = -1 if not log.isEnabledFor(logging.INFO) else 1 if log.isEnabledFor(logging.DEBUG) else 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging, initargs=(verbosity,)) as executor:
+        results = list(executor.map(collect_job, jobs))
+
+    with WorkbookSession() as session:
+        for result in results:
+            start = time.perf_counter()
+            high_light_price_increase(result.matched, result.job.price_increase, result.price_increase_indices[0],
+                                      result.price_increase_indices[1], session,
+                                      sku_column=column_index_from_string(result.price_increase_columns[0]) - 1)
+            result.timings["highlight"] = time.perf_counter() - start
+
+        for master, (master_results, matched) in merge_updates(results).items():
+            start = time.perf_counter()
+            first_row = min(result.master_indices[0] for result in master_results)
+            last_row = max(result.master_indices[1] for result in master_results)
+            end_of_old = master_results[0].old_layout_end
+            sku_column, price_column = master_results[0].master_column_indices
+            layout = parse_master_layout(session.worksheet(master), min(first_row, 2) if end_of_old else first_row,
+                                         max(last_row, end_of_old or 0), sku_column)
+            old_dict = create_old_prod_dict(master, master_results[0].job.site, layout, session, end_of_old,
+                                            sku_column)
+            update_price(matched, master, first_row, last_row, old_dict, layout, session,
+                         sku_column=sku_column, price_column=price_column)
+            elapsed = time.perf_counter() - start
+            for result in master_results:
+                result.timings["update"] = elapsed / len(master_results)  # The update is shared by these jobs
+
+    for result in results:
+        log.info("%s matched %s SKU numbers, %s", result.job, len(result.matched),
+                 ", ".join(stage + " " + format(seconds, ".2f") + "s" for stage, seconds in result.timings.items()))
+    log.info("Finished %s jobs in %.2fs, the save is included in the total", len(results),
+             time.perf_counter() - batch_start)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run every price update job of a manifest.")
+    parser.add_argument("manifest", help="json file with the list of jobs")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log the details of every row")
+    arguments = parser.parse_args()
+    configure_logging(-1 if arguments.quiet else 1 if arguments.verbose else 0)
+    run_batch(load_manifest(arguments.manifest), arguments.workers)
@@ -0,0 +1,173 @@
+"""Generator of made up workbooks for timing the price update.
+
+The real master sheets and price increase files can not be shared, so this makes files with the same layout instead. The
+master sheet looks like a BigCommerce export: Product rows, products with options that have SKU rows and Rule rows with
+"[FIXED]" prices, products on the old layout with a "-old" SKU number, and products with a price of zero. The price
+increase and scrape files use SKU numbers from the master sheet so most of their rows find a match.
+
+Run it with ``python generate_workbooks.py --rows 5000 --out bench_data``.
+"""
+import argparse
+import os
+import random
+
+import openpyxl
+
+MASTER_HEADERS = ["Item Type", "Product ID", "Product Name", "Product Code/SKU", "Price", "Category"]
+INCREASE_HEADERS = ["MPN", "Purchase Description", "U/M", "Sell"]
+SCRAPE_HEADERS = ["URL", "NAME", "PRICE", "SKU"]
+SCRAPE_PREFIX = "CL-"  # Removed again by 'compare_Scrape_Verus_Master' with its default prefix length of 3
+
+
+def write_workbook(file_name, headers, rows):
+    """
+    Write rows to a new workbook with a single sheet named "info".
+
+    :param file_name: Represents the name of the file.
+    :param headers: Represents the headers of the first row.
+    :param rows: Represents the rows that go under the headers.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("info")
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(file_name)
+
+
+def master_rows(row_count, rng, old_share=0.15, option_share=0.2, zero_share=0.05):
+    """
+    Make the rows of a master sheet
+
+    The products on the old layout all come first, like they do in the real exports. Their new layout versions come
+    later, some as a product of their own and some as an option of a product with options, which is the case where the
+    "[FIXED]" price of the option also gets written to the "-old" row.
+
+    :param row_count: Represents about how many rows to make, a product with options is never cut in half.
+    :param rng: Represents the random.Random to use.
+    :param old_share: Represents the share of the rows that are products on the old layout.
+    :param option_share: Represents the share of the products that have options.
+    :param zero_share: Represents the share of the products that have a price of zero.
+    :return: This will return a tuple of the rows and the list of SKU numbers with a price.
+    """
+    rows = []
+    priced_skus = []
+    product_id = 1000
+    next_sku = 100000
+    while len(rows) < row_count * old_share:
+        product_id += 1
+        rows.append(["Product", product_id, "Old Product " + str(product_id), str(next_sku) + "-old",
+                     round(rng.uniform(5, 2500), 2), "Old Layout"])
+        next_sku += 7
+    old_count = len(rows)
+
+    old_sku = 100000
+
+    def reuse_old_sku(share):
+        # The new layout version of an old product keeps the same SKU number without "-old"
+        return old_sku < 100000 + old_count * 7 and rng.random() < share
+
+    while len(rows) < row_count:
+        product_id += 1
+        name = "Product " + str(product_id)
+        if rng.random() < option_share:
+            option_skus = []
+            for _ in range(rng.randint(2, 4)):
+                if reuse_old_sku(0.3):
+                    option_skus.append(str(old_sku))
+                    old_sku += 7
+                else:
+                    option_skus.append(str(next_sku))
+                    next_sku += 1
+            rows.append(["Product", product_id, name, None, 0, "Options"])
+            for option, sku in enumerate(option_skus):
+                rows.append(["  SKU", product_id * 10 + option, "[S]Size Options=" + str(option), sku, None, None])
+            for option, sku in enumerate(option_skus):
+                rows.append(["  Rule", product_id * 10 + option, None, sku,
+                             "[FIXED]" + format(rng.uniform(5, 2500), ".2f"), None])
+            priced_skus.extend(option_skus)
+            continue
+
+        if reuse_old_sku(0.5):
+            sku = str(old_sku)
+            old_sku += 7
+        else:
+            sku = str(next_sku)
+            next_sku += 1
+        price = 0 if rng.random() < zero_share else round(rng.uniform(5, 2500), 2)
+        rows.append(["Product", product_id, name, sku, price, "Products"])
+        if price:
+            priced_skus.append(sku)
+    return rows, priced_skus
+
+
+def increase_rows(row_count, skus, rng, match_share=0.75):
+    """
+    Make the rows of a price increase file.
+
+    :param row_count: Represents how many rows to make.
+    :param skus: Represents the SKU numbers of the master sheet.
+    :param rng: Represents the random.Random to use.
+    :param match_share: Represents the share of the rows that have a SKU number from the master sheet.
+    :return: This will return the rows.
+    """
+    rows = []
+    for number in range(row_count):
+        sku = rng.choice(skus) if rng.random() < match_share else "NEW" + str(number)
+        rows.append([sku, "Description " + str(number), "5 gal. Pail", round(rng.uniform(5, 2500), 4)])
+    return rows
+
+
+def scrape_rows(row_count, skus, rng, match_share=0.75, sold_out_share=0.05):
+    """
+    Make the rows of a scrape file, with prices written the way a website shows them.
+
+    :param row_count: Represents how many rows to make.
+    :param skus: Represents the SKU numbers of the master sheet.
+    :param rng: Represents the random.Random to use.
+    :param match_share: Represents the share of the rows that have a SKU number from the master sheet.
+    :param sold_out_share: Represents the share of the rows that are sold out.
+    :return: This will return the rows.
+    """
+    rows = []
+    for number in range(row_count):
+        sku = rng.choice(skus) if rng.random() < match_share else "X" + str(number)
+        price = "SOLD OUT" if rng.random() < sold_out_share else "\n        ${:,.2f}\n".format(rng.uniform(5, 2500))
+        rows.append(["https://example.com/" + str(number), "Scraped " + str(number), price, SCRAPE_PREFIX + sku])
+    return rows
+
+
+def generate(out_dir, rows, increase_rows_count=None, scrape_rows_count=None, seed=0):
+    """
+    Generate a master sheet, a price increase file and a scrape file.
+
+    :param out_dir: Represents the folder the files are written to.
+    :param rows: Represents about how many rows the master sheet has.
+    :param increase_rows_count: Represents how many rows the price increase file has, a tenth of the master if None.
+    :param scrape_rows_count: Represents how many rows the scrape file has, a quarter of the master if None.
+    :param seed: Represents the seed, so the same arguments always make the same files.
+    :return: This will return a dictionary with the names of the "master", "increase" and "scrape" files.
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    files = {name: os.path.join(out_dir, name + "-" + str(rows) + ".xlsx") for name in ("master", "increase", "scrape")}
+
+    master, skus = master_rows(rows, rng)
+    write_workbook(files["master"], MASTER_HEADERS, master)
+    write_workbook(files["increase"], INCREASE_HEADERS,
+                   increase_rows(increase_rows_count or max(rows // 10, 1), skus, rng))
+    write_workbook(files["scrape"], SCRAPE_HEADERS, scrape_rows(scrape_rows_count or max(rows // 4, 1), skus, rng))
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate made up workbooks for timing the price update.")
+    parser.add_argument("--rows", type=int, default=5000, help="about how many rows the master sheet has")
+    parser.add_argument("--increase-rows", type=int, default=None, help="rows in the price increase file")
+    parser.add_argument("--scrape-rows", type=int, default=None, help="rows in the scrape file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_data", help="folder the files are written to")
+    arguments = parser.parse_args()
+    for kind, file_name in generate(arguments.out, arguments.rows, arguments.increase_rows, arguments.scrape_rows,
+                                    arguments.seed).items():
+        print(kind + ": " + file_name)
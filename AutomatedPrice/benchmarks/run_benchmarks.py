@@ -0,0 +1,107 @@
+"""Benchmarks for each stage of the price update.
+
+Generates made up workbooks of each size with 'generate_workbooks', then times each stage of the price update on them
+and measures the most memory it used with tracemalloc. Each stage gets the output of the stage before it, and the
+workbooks are loaded once before the stages that need them, so the time to load and save is measured on its own.
+
+Run it with ``python run_benchmarks.py --sizes 1000,5000,20000``.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_workbooks import generate  # noqa: E402
+from main import (check_which_products_exist, collect_information, compare_Scrape_Verus_Master,  # noqa: E402
+                  configure_logging, create_old_prod_dict, high_light_price_increase, update_price)
+from master_layout import parse_master_layout  # noqa: E402
+from sheet_profile import profile_sheet  # noqa: E402
+from sku_index import SkuIndex  # noqa: E402
+from workbook_session import WorkbookSession  # noqa: E402
+
+
+def measure(results, size, stage, function, *args, **kwargs):
+    """
+    Run a stage and remember how long it took and the most memory it used.
+
+    :param results: Represents the list the measurement is added to.
+    :param size: Represents the number of rows of the master sheet.
+    :param stage: Represents the name of the stage.
+    :param function: Represents the function that runs the stage.
+    :return: This will return what the function returned.
+    """
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    value = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - start_memory
+    results.append({"size": size, "stage": stage, "seconds": round(seconds, 4), "peak_mb": round(peak / 2 ** 20, 2)})
+    print("{:>8} {:<16} {:>9.3f}s {:>9.2f} MB".format(size, stage, seconds, peak / 2 ** 20))
+    return value
+
+
+def benchmark_size(size, out_dir, results):
+    """
+    Benchmark every stage on workbooks of one size.
+
+    :param size: Represents about how many rows the master sheet has.
+    :param out_dir: Represents the folder the workbooks are generated in.
+    :param results: Represents the list the measurements are added to.
+    """
+    files = generate(out_dir, size)
+    master = files["master"]
+    increase = files["increase"]
+
+    with WorkbookSession(read_only=True) as source:
+        master_profile = profile_sheet(source.worksheet(master, 'info'))
+        increase_profile = profile_sheet(source.worksheet(increase, 'info'))
+
+    price_changes = measure(results, size, "collect increase", collect_information, increase, 'info',
+                            increase_profile.columns, increase_profile.first_row, increase_profile.last_row)
+    master_information = measure(results, size, "collect master", collect_information, master, 'info',
+                                 master_profile.columns, master_profile.first_row, master_profile.last_row)
+    master_index = SkuIndex(master_information)
+    matched = measure(results, size, "match", check_which_products_exist, price_changes, master_index)
+
+    session = WorkbookSession()
+    measure(results, size, "load", lambda: (session.workbook(master), session.workbook(increase)))
+    measure(results, size, "highlight", high_light_price_increase, master_index, increase, increase_profile.first_row,
+            increase_profile.last_row, session, sku_column=increase_profile.column_indices[0])
+    layout = measure(results, size, "layout", parse_master_layout, session.worksheet(master), master_profile.first_row,
+                     master_profile.last_row)
+    old_dict = measure(results, size, "old layout", create_old_prod_dict, master, "PSC", layout, session,
+                       master_profile.old_layout_end)
+    measure(results, size, "update", update_price, matched, master, master_profile.first_row,
+            master_profile.last_row, old_dict, layout, session)
+    measure(results, size, "save", session.save)
+    session.close()
+
+    measure(results, size, "compare", compare_Scrape_Verus_Master, files["scrape"], 'info', None, None, None, master,
+            os.path.join(out_dir, "compare-" + str(size) + ".xlsx"), 'info')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time each stage of the price update on made up workbooks.")
+    parser.add_argument("--sizes", default="1000,5000", help="comma separated master sheet sizes, in rows")
+    parser.add_argument("--out", default=None, help="folder for the workbooks, a temporary folder if not given")
+    parser.add_argument("--json", default=None, help="file to write the measurements to as json")
+    arguments = parser.parse_args()
+    configure_logging(-1)
+
+    measurements = []
+    tracemalloc.start()
+    print("{:>8} {:<16} {:>10} {:>12}".format("rows", "stage", "time", "peak memory"))
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        for rows in [int(size) for size in arguments.sizes.split(",")]:
+            benchmark_size(rows, arguments.out or temporary_dir, measurements)
+    tracemalloc.stop()
+
+    if arguments.json is not None:
+        with open(arguments.json, "w") as report:
+            json.dump(measurements, report, indent=2)
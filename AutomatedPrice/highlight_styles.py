@@ -0,0 +1,106 @@
+"""Highlight colors that are shared by every cell of a workbook.
+
+Each highlight color is registered once in a workbook as a named style, like "Highlight Green", and every highlighted
+cell points to that style instead of getting its own fill. The named style is a copy of the "Normal" style of the
+workbook with only the fill changed, so the highlighted cells keep the font of the rest of the sheet. Rows are
+highlighted in bulk with 'highlight_rows', which looks up the used columns of the sheet once instead of once for every
+row.
+"""
+from copy import copy
+
+from openpyxl.styles import NamedStyle, PatternFill
+
+GREEN = '0000FF00'
+YELLOW = '00FFFF00'
+STYLE_NAMES = {GREEN: "Highlight Green", YELLOW: "Highlight Yellow"}
+
+
+def solid_fill(color):
+    """
+    :param color: Represents the aRGB color, like GREEN.
+    :return: This will return a solid PatternFill of the color.
+    """
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+class HighlightStyles:
+    """
+    The highlight styles of one workbook, each registered the first time it is used.
+    """
+
+    def __init__(self, wb):
+        """
+        :param wb: Represents the openpyxl Workbook the styles belong to.
+        """
+        self.wb = wb
+        self.fills = {}
+
+    def style_name(self, color):
+        """
+        Get the named style of a color, adding it to the workbook if it is not there yet.
+
+        :param color: Represents the aRGB color.
+        :return: This will return the name of the style.
+        """
+        name = STYLE_NAMES.get(color, "Highlight " + color)
+        if color not in self.fills:
+            if name not in self.wb.named_styles:
+                self.wb.add_named_style(self.normal_style(name, color))
+            self.fills[color] = solid_fill(color)
+        return name
+
+    def normal_style(self, name, color):
+        """
+        Make a named style like the "Normal" style of the workbook, but with a solid fill.
+
+        :param name: Represents the name of the new style.
+        :param color: Represents the aRGB color of the fill.
+        :return: This will return the NamedStyle.
+        """
+        style = NamedStyle(name=name, fill=solid_fill(color))
+        if "Normal" in self.wb.named_styles:
+            normal = self.wb._named_styles["Normal"]
+            style.font = copy(normal.font)
+            style.border = copy(normal.border)
+            style.alignment = copy(normal.alignment)
+            style.protection = copy(normal.protection)
+            style.number_format = normal.number_format
+        return style
+
+    def fill(self, color):
+        """
+        :param color: Represents the aRGB color.
+        :return: This will return the shared PatternFill of the color.
+        """
+        self.style_name(color)
+        return self.fills[color]
+
+
+def highlight_rows(ws, row_indices, color, styles=None):
+    """
+    Highlight rows
+
+    Highlights every cell in the used columns of each row. A cell without a style of its own gets the named style of the
+    color, and a cell that already has a style, like a number format or a font, only has its fill changed so the rest of
+    its style is kept.
+
+    :param ws: Represents the worksheet.
+    :param row_indices: Represents the numbers of the rows to highlight, starting from one.
+    :param color: Represents the aRGB color, like GREEN or YELLOW.
+    :param styles: Represents the HighlightStyles of the workbook, which gets made here if it is not given.
+    :return: This will return the number of cells that were highlighted.
+    """
+    styles = styles or HighlightStyles(ws.parent)
+    name = styles.style_name(color)
+    fill = styles.fill(color)
+    columns = range(ws.min_column, ws.max_column + 1)
+    cells_written = 0
+    for row_number in row_indices:
+        for column in columns:
+            cell = ws.cell(row_number, column)
+            if cell.has_style:
+                cell.fill = fill
+            else:
+                cell.style = name
+        cells_written += len(columns)
+    return cells_written
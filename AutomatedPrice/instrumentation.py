@@ -0,0 +1,182 @@
+"""Timing and memory of each stage of a run.
+
+A RunRecorder wraps each stage of a run, like loading the workbooks, matching, highlighting or saving, and remembers how
+long it took, how many rows it went through, how many cells it wrote, and how much the peak memory of the process grew
+while it ran. At the
+end of the run it all gets written to a json report, so a slow run shows which stage the time went to. Optionally every
+stage is run under cProfile, and the profile of the slowest stage is saved next to the report.
+"""
+import cProfile
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+log = logging.getLogger("AutomatedPrice.instrumentation")
+
+
+def peak_rss_mb():
+    """
+    :return: This will return the most memory the process has used so far in MB, or None where that is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak in KB and macOS in bytes
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 2)
+
+
+class StageRecord:
+    """
+    What was recorded for one stage. The rows and cells are filled in by the stage itself with 'add'.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = 0
+        self.cells_written = 0
+        self.peak_traced_mb = None
+        self.peak_rss_growth_mb = None
+        self.process_peak_rss_mb = None
+
+    def add(self, rows=0, cells_written=0):
+        """
+        :param rows: Represents how many more rows the stage went through.
+        :param cells_written: Represents how many more cells the stage wrote.
+        """
+        self.rows += rows
+        self.cells_written += cells_written
+
+    def as_dict(self):
+        return {"stage": self.name, "seconds": round(self.seconds, 4), "rows": self.rows,
+                "cells_written": self.cells_written, "peak_traced_mb": self.peak_traced_mb,
+                "peak_rss_growth_mb": self.peak_rss_growth_mb, "process_peak_rss_mb": self.process_peak_rss_mb}
+
+
+class RunRecorder:
+    """
+    Records every stage of a run.
+
+    The peak memory of the process is recorded before and after every stage where the platform has it, so the growth
+    shows which stage pushed the peak up. A stage that stays under an earlier peak shows no growth. Measuring with
+    tracemalloc slows the run down a lot, so it is only done when trace_memory is True, or when the peak memory of the
+    process is not available, like on Windows, so the report always has memory data. Can be used as a context manager,
+    in which case tracemalloc is stopped when the block finishes.
+    """
+
+    def __init__(self, trace_memory=False, profile=False):
+        """
+        :param trace_memory: Represents whether the peak memory of each stage is measured with tracemalloc. It is always
+        measured when the peak memory of the process is not available.
+        :param profile: Represents whether each stage is run under cProfile, keeping the profile of the slowest one.
+        """
+        self.trace_memory = trace_memory or resource is None
+        self.profile = profile
+        self.stages = []
+        self.started = datetime.now()
+        self.slowest_profile = None
+        self.started_tracing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stop tracemalloc if the recorder is the one that started it.
+        """
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Record a stage
+
+        :param name: Represents the name of the stage.
+        :return: This will yield the StageRecord of the stage, so the stage can add its rows and cells.
+        """
+        record = StageRecord(name)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_rss = peak_rss_mb()
+        profiler = cProfile.Profile() if self.profile else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.seconds = time.perf_counter() - start
+            if self.trace_memory:
+                record.peak_traced_mb = round((tracemalloc.get_traced_memory()[1] - start_memory) / 2 ** 20, 2)
+            record.process_peak_rss_mb = peak_rss_mb()
+            if start_rss is not None:
+                record.peak_rss_growth_mb = round(record.process_peak_rss_mb - start_rss, 2)
+            if profiler is not None and (self.slowest_profile is None
+                                         or record.seconds > self.slowest_stage().seconds):
+                self.slowest_profile = profiler
+            self.stages.append(record)
+            log.debug("The %s stage took %.3fs for %s rows and %s cells", name, record.seconds, record.rows,
+                      record.cells_written)
+
+    def slowest_stage(self):
+        """
+        :return: This will return the StageRecord of the slowest stage, or None if nothing was recorded.
+        """
+        return max(self.stages, key=lambda record: record.seconds, default=None)
+
+    def report(self):
+        """
+        :return: This will return the run report as a dictionary.
+        """
+        slowest = self.slowest_stage()
+        return {"started": self.started.isoformat(timespec="seconds"),
+                "total_seconds": round(sum(record.seconds for record in self.stages), 4),
+                "slowest_stage": slowest.name if slowest is not None else None,
+                "stages": [record.as_dict() for record in self.stages]}
+
+    def write_report(self, report_name, profile_name=None):
+        """
+        Write the run report as json, and the profile of the slowest stage if there is one.
+
+        :param report_name: Represents the name of the json file.
+        :param profile_name: Represents the name of the profile file, the report name followed by ".prof" if None. It
+        can be opened with pstats or snakeviz.
+        """
+        report = self.report()
+        if self.slowest_profile is not None:
+            profile_name = profile_name or report_name + ".prof"
+            self.slowest_profile.dump_stats(profile_name)
+            report["profile"] = profile_name
+        with open(report_name, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        log.info("Wrote the run report %s, the slowest stage was %s", report_name, report["slowest_stage"])
+
+
+class NoRecorder:
+    """
+    Stands in for a RunRecorder when nothing should be recorded.
+    """
+
+    @contextmanager
+    def stage(self, name):
+        yield StageRecord(name)
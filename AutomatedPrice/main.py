@@ -11,60 +11,158 @@ is the universal standard in this program for all sheets to be named this, and i
 need be.
 
 """
-import locale
-import time
-from itertools import chain
+import argparse
+import logging
+import math
+import os
+from collections import namedtuple
+from contextlib import nullcontext
 import openpyxl
-from openpyxl.styles import PatternFill, numbers
+from openpyxl.styles import numbers
+from openpyxl.utils import column_index_from_string
+from highlight_styles import GREEN, YELLOW, highlight_rows
+from instrumentation import NoRecorder, RunRecorder
+from master_layout import PRICE_COLUMN, SKU_COLUMN, parse_master_layout
+from price_compare import HIGHER_LABEL, compare_prices, scrape_sku_rule
+from price_snapshot import SNAPSHOT_EXTENSION, PriceSnapshot
+from price_table import FIXED, parse_price
+from report_writer import REPORT_HEADERS, throttled, write_report
+from sheet_profile import OLD_LAYOUT_SITES, find_columns, profile_sheet
+from sku_index import SkuIndex
+from workbook_session import WorkbookSession
+
+# Every stage has its own logger, so the detail of one stage can be turned on without the rest. The details of each row
+# are only logged at the debug level, and each stage logs a single summary line at the info level.
+LOGGER_NAME = "AutomatedPrice"
+collect_log = logging.getLogger(LOGGER_NAME + ".collect")
+match_log = logging.getLogger(LOGGER_NAME + ".match")
+update_log = logging.getLogger(LOGGER_NAME + ".update")
+highlight_log = logging.getLogger(LOGGER_NAME + ".highlight")
+report_log = logging.getLogger(LOGGER_NAME + ".report")
+pipeline_log = logging.getLogger(LOGGER_NAME + ".pipeline")
+
+
+def configure_logging(verbosity=0):
+    """
+    Set up the logging for a run
+
+    :param verbosity: Represents how much gets logged. Below zero only warnings are logged, zero logs the summary of
+    each stage, and above zero also logs the details of every row.
+    """
+    if verbosity < 0:
+        level = logging.WARNING
+    elif verbosity == 0:
+        level = logging.INFO
+    else:
+        level = logging.DEBUG
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    logging.getLogger(LOGGER_NAME).setLevel(level)
+
+
+PriceRecord = namedtuple("PriceRecord", ["row", "sku", "price", "fixed"])
 
 
-def collect_information(workbook_name, sheet_name, columns, starting_row_number, finishing_row_number):
+def read_price(value):
+    """
+    Read a price cell
+
+    Helper method for turning the value of a price cell into a number with 'parse_price', so every price cell is read the
+    same way. Values that are not a price, like "SOLD OUT", are kept as stripped text without the "[FIXED]" tag.
+
+    :param value: Represents the value of the price cell.
+    :return: This will return a tuple of the price and whether it was a "[FIXED]" price.
+    """
+    price, status = parse_price(value)
+    if not math.isnan(price):
+        return price, status == FIXED
+    if value is None:
+        return None, False
+    text = str(value).strip()
+    fixed = text.startswith("[FIXED]")
+    if fixed:
+        text = text[len("[FIXED]"):].strip()
+    return text, fixed
+
+
+def iter_information(workbook_name, sheet_name, columns, starting_row_number, finishing_row_number, session=None):
+    """
+    Stream information from excel file
+
+    Generator that goes through the rows of an excel file a single time and yields a PriceRecord for each one. When no
+    session is given the file is opened in read only mode, which keeps the memory flat no matter how many rows the file
+    has.
+
+    :param workbook_name: This represents the workbook name of the excel file we are collecting.
+    :param sheet_name: This represents the name of the sheet, usually just change it to "info". The active sheet is used
+    if it is None.
+    :param columns: An array containing the letters of the SKU number and the price.
+    :param starting_row_number: Represents the starting position.
+    :param finishing_row_number: Represents the ending position. When it is None the sheet is read to the end in the
+    same pass, and the rows with neither a SKU number nor a price are left out.
+    :param session: Represents the WorkbookSession to get the workbook from.
+    :return: This will yield a PriceRecord with the row number, the SKU number, the price and whether it was fixed.
+    """
+    own_session = session is None
+    if own_session:
+        session = WorkbookSession(read_only=True)
+    sheet = session.worksheet(workbook_name, sheet_name)
+
+    sku_column, price_column = [column_index_from_string(column) for column in columns[:2]]
+    first_column = min(sku_column, price_column)
+    sku_offset = sku_column - first_column
+    price_offset = price_column - first_column
+    width = max(sku_offset, price_offset) + 1
+    try:
+        rows = sheet.iter_rows(starting_row_number, finishing_row_number, first_column, max(sku_column, price_column),
+                               values_only=True)
+        for row_number, row in enumerate(rows, starting_row_number):
+            row = row + (None,) * (width - len(row))  # read only mode can cut rows short
+            if finishing_row_number is None and row[sku_offset] is None and row[price_offset] is None:
+                continue
+            price, fixed = read_price(row[price_offset])
+            yield PriceRecord(row_number, str(row[sku_offset]).strip().upper(), price, fixed)
+    finally:
+        if own_session:
+            session.close()
+
+
+def counted(records, record):
+    """
+    Pass the records of 'iter_information' through, adding each one to the rows of a StageRecord.
+
+    :param records: Represents the records.
+    :param record: Represents the StageRecord.
+    :return: This will yield the same records.
+    """
+    for i in records:
+        record.add(1)
+        yield i
+
+
+def collect_information(workbook_name, sheet_name, columns, starting_row_number, finishing_row_number, session=None):
     """
     Collect information from excel file
 
     This function should be used to collect data from a given excel file. In this project we are normally trying
-    to collect the SKU number of a product and the respectable price.
+    to collect the SKU number of a product and the respectable price. It collects everything 'iter_information' yields
+    into a list.
 
     :param workbook_name: This represents the workbook name of the excel file we are collecting.
     :param sheet_name: This represents the name of the sheet, usually just change it to "info"
     :param columns: An array containing the letters of the SKU number and the price.
     :param starting_row_number: Represents the starting position.
     :param finishing_row_number: Represents the ending position.
+    :param session: Represents the WorkbookSession to get the workbook from, the file is streamed in read only mode if
+    not given.
     :return: This will return a list where each element is a list containing the SKU number and the price.
     """
     master_list = []
-    wb = openpyxl.load_workbook(workbook_name)
-    sheet = wb[sheet_name]
-    # col = sheet.column_dimensions[columns[0]]
-    # col.number_format = numbers.BUILTIN_FORMATS[1]
-
-    for i in range(starting_row_number, finishing_row_number + 1):
-        row_properties = []
-        row_string = str(i)
-        for j in range(len(columns)):  # zero is sku, one is price
-            column_letter = columns[j]
-            value = sheet[column_letter + row_string].value
-            if j == 0:
-                value = str(sheet[column_letter + row_string].value).strip().upper()
-                # print("EXCEL GOT A VALUE OF: " + str(value))
-                # cell = sheet[column_letter + row_string]
-                # cell.number_format = numbers.FORMAT_NUMBER
-            elif j == 1:
-                if "[FIXED]" in str(value):
-                    roundPrice = value.replace("[FIXED]", "")
-                try:
-                    value = value + .0001
-                    roundPrice = round(value, 2)
-                except TypeError:
-                    pass
-
-                value = str(roundPrice)
-                print("This was the rounded Price: " + value)
-            row_properties.append(value)
-
-        master_list.append(row_properties)
-        print("Cell information was collected: " + str(i))
-    print("finished")
+    for record in iter_information(workbook_name, sheet_name, columns, starting_row_number, finishing_row_number,
+                                   session):
+        master_list.append([record.sku, str(record.price)])
+        collect_log.debug("Collected row %s with the SKU %s and the rounded price %s", record.row, record.sku,
+                          record.price)
+    collect_log.info("Collected %s rows from %s", len(master_list), workbook_name)
     return master_list
 
 
@@ -73,96 +171,121 @@ def check_which_products_exist(first_list, second_list):
     Find matches between two lists.
 
     This function takes one list and compares it with the second list. In our case the first case is the price increases
-    and the second list is the master list.
+    and the second list is the master list. The second list gets turned into a SkuIndex once, so each lookup is a single
+    dictionary access instead of a scan through the whole master list.
     :param first_list: Represents the first list filled with elements that contain a SKU number and a price.
-    :param second_list: Represents the list we are comparing to.
+    :param second_list: Represents the list we are comparing to, or a SkuIndex that was already built from it.
     :return: This will return a list of lists where each element has a SKU number and a price, but specifically it is
     only the ones that had a match.
     """
-    matched_ids = []
-    matched_count = 0
-    for i in first_list:
-        product_id = i[0]
-        print("This is the product id: " + product_id)
-        is_found = product_id in chain(*second_list)
-        if is_found:
-            print("Match")
-            matched_count = matched_count + 1
-            matched_ids.append(i)
-    print("Matched: " + str(matched_count) + " out of: " + str(len(first_list)))
-    return matched_ids
-
-
-def update_price(matched_list, workbook_name, start_row, last_row, old_dict):
+    index = second_list if isinstance(second_list, SkuIndex) else SkuIndex(second_list)
+    result = index.match(first_list)
+    for i in result.unmatched:
+        match_log.debug("No match for the product id: %s", i[0])
+    if result.duplicate_skus:
+        match_log.debug("These SKU numbers are found more than once in the master list: %s",
+                        sorted(result.duplicate_skus))
+    match_log.info("Matched: %s out of: %s, %s of them are found more than once in the master list",
+                   len(result.matched), len(first_list), len(result.duplicate_skus))
+    return result.matched
+
+
+def update_price(matched_list, workbook_name, start_row, last_row, old_dict, layout=None, session=None, save_as=None,
+                 record=None, sku_column=SKU_COLUMN, price_column=PRICE_COLUMN):
     """
     Update the price in the master sheet.
 
     Function is used to update the master sheet with the matched_list element. This element is a list that contains
-    matched SKU numbers and the new price that needs to be added. This function should not return anything, should
-    simply update the products in the master sheet.
+    matched SKU numbers and the new price that needs to be added. The layout of the master sheet is parsed once up front,
+    so every update after that goes straight to the right rows, including the SKU and Product rows of a variant. The rows
+    that changed are highlighted together with 'highlight_rows' after every price is updated.
 
     :param old_dict: Dictionary of where the skus of products on the old format are in the excel file
     :param matched_list: Represents a list of lists with matched ID's.
     :param workbook_name: Represents the name of the workbook we are trying to update.
     :param start_row: Represents where we are starting.
     :param last_row: Represents where we are ending.
+    :param layout: Represents the MasterLayout of the master sheet, which gets parsed here if it is not given. Only the
+    rows between the start row and the last row get updated, even when the layout covers more of the sheet.
+    :param session: Represents the WorkbookSession that holds the master sheet. When it is given the updated workbook is
+    only marked to be saved, otherwise it gets saved right away.
+    :param save_as: Represents the name the updated workbook is saved as, which is the workbook name followed by
+    "_Updated.xlsx" if it is not given.
+    :param record: Represents the StageRecord that the number of rows and cells written gets added to.
+    :param sku_column: Represents the index of the SKU column in a row, starting from zero.
+    :param price_column: Represents the index of the price column in a row, starting from zero.
+    :return: This will return a list of the SKU numbers that could not be found in the master sheet.
     """
-    print("we are inside this update function")
-    wb = openpyxl.load_workbook(workbook_name)
-    ws = wb.active
-    green_fill = PatternFill(start_color='0000FF00',
-                             end_color='0000FF00',
-                             fill_type='solid')
+    own_session = session is None
+    if own_session:
+        session = WorkbookSession()
+    ws = session.worksheet(workbook_name)
+    if layout is None:
+        layout = parse_master_layout(ws, start_row, last_row, sku_column)
+    not_found = []
+    updated = 0
+    # The rows are only highlighted once every price is updated, so each row gets highlighted a single time
+    green_rows = set()
+    cells_written = 0
     # Be careful when updating the master sheet because it might be the wrong column.
     for i in matched_list:  # The i's represent the product properties
         product_id = i[0]
-        results = False
-        while not results:
-            for row in ws.iter_rows(start_row, last_row):
-                if str(row[3].value).strip().upper() == product_id:
-                    print("ID: " + str(row[1].value) + " was found and the price is: " + str(row[4].value))
-                    old_price = str(row[4].value).replace("[FIXED]", "")
-                    if str(row[4].value).strip() == '0':  # Checking the master list if the price is zero
-                        print("We do not work with this product!")
-                        results = True
-                    else:
-                        if old_price != str(i[1]) and row[4].value is not None:
-                            highlight_row(row, green_fill)
-                            if str(row[4].value) != "None":
-                                if "[FIXED]" in str(row[4].value):
-                                    row[4].value = "[FIXED]" + i[1]
-                                    search_row = row
-                                    search_row = ws[search_row[0].row - 1]
-                                    while search_row[3].value != row[3].value:
-                                        search_row = ws[search_row[0].row - 1]
-                                        # print("Searching for SKU row and at row: " + str(search_row))
-                                    highlight_row(search_row, green_fill)
-                                    print("Found SKU row with A value as: " + str(search_row[0].value) + " and a SKU of"
-                                                                                                         + str(search_row[3].value))
-
-                                    # Loop up the rows until the Product row is found, and highlights it green
-                                    while search_row[0].value != "Product":
-                                        search_row = ws[search_row[0].row - 1]
-                                    highlight_row(search_row, green_fill)
-
-                                    # Look up where the old sku row is, and then update and highlight it
-                                    if old_dict is not None:
-                                        try:
-                                            old_row = old_dict[(product_id + "-OLD")]
-                                            ws[old_row][4].value = i[1]
-                                            highlight_row(ws[old_row], green_fill)
-                                        # If there is no old version, move on
-                                        except KeyError:
-                                            print("There is no old version of this product")
-                                else:
-                                    row[4].value = i[1]
-                                print("Updated the price with: " + str(i[1]))
-                        results = True
-    wb.save(workbook_name + "_Updated.xlsx")
-    print("Saved the " + workbook_name + " workbook!")
-
-
-def high_light_price_increase(matched_list, workbook_name, start_row, last_row):
+        row_numbers = [row_number for row_number in layout.rows(product_id) if start_row <= row_number <= last_row]
+        if not row_numbers:
+            update_log.debug("ID: %s was not found in the master sheet", product_id)
+            not_found.append(product_id)
+            continue
+        for row_number in row_numbers:
+            price_cell = ws.cell(row_number, price_column + 1)
+            update_log.debug("ID: %s was found and the price is: %s", ws.cell(row_number, 2).value, price_cell.value)
+            old_price = str(price_cell.value).replace("[FIXED]", "")
+            if str(price_cell.value).strip() == '0':  # Checking the master list if the price is zero
+                update_log.debug("We do not work with this product!")
+            elif old_price != str(i[1]) and price_cell.value is not None:
+                green_rows.add(row_number)
+                if "[FIXED]" in str(price_cell.value):
+                    price_cell.value = "[FIXED]" + i[1]
+                    sku_row_number = layout.sku_row(row_number)
+                    if sku_row_number is not None:
+                        green_rows.add(sku_row_number)
+                        update_log.debug("Found SKU row with A value as: %s and a SKU of %s",
+                                         ws.cell(sku_row_number, 1).value,
+                                         ws.cell(sku_row_number, sku_column + 1).value)
+
+                    # Highlight the Product row this variant belongs to green
+                    product_row_number = layout.parent_row(sku_row_number or row_number)
+                    if product_row_number is not None:
+                        green_rows.add(product_row_number)
+
+                    # Look up where the old sku row is, and then update and highlight it
+                    if old_dict is not None:
+                        try:
+                            old_row = int(old_dict[(product_id + "-OLD")])
+                            ws.cell(old_row, price_column + 1).value = i[1]
+                            green_rows.add(old_row)
+                            cells_written += 1
+                        # If there is no old version, move on
+                        except KeyError:
+                            update_log.debug("There is no old version of this product")
+                else:
+                    price_cell.value = i[1]
+                updated += 1
+                cells_written += 1
+                update_log.debug("Updated the price with: %s", i[1])
+    cells_written += highlight_rows(ws, sorted(green_rows), GREEN, session.styles(workbook_name))
+    if not_found:
+        update_log.warning("These SKU numbers were not found in the master sheet: %s", not_found)
+    update_log.info("Updated %s prices in %s for %s SKU numbers", updated, workbook_name, len(matched_list))
+    if record is not None:
+        record.add(len(matched_list), cells_written)
+    session.mark_dirty(workbook_name, save_as or workbook_name + "_Updated.xlsx")
+    if own_session:
+        session.save()
+    return not_found
+
+
+def high_light_price_increase(matched_list, workbook_name, start_row, last_row, session=None, record=None,
+                              sku_column=0):
     """
     Highlighting rows in the price increase sheet.
 
@@ -170,83 +293,76 @@ def high_light_price_increase(matched_list, workbook_name, start_row, last_row):
     sheet should be highlighted green, and rows that are not found should be highlighted yellow. This function should
     not return anything. It should just highlight rows in the excel file.
 
-    :param matched_list: Represents a list of matched ID's.
+    :param matched_list: Represents a list of matched ID's, or the SkuIndex of the master list.
     :param workbook_name: Represents the workbook name we are looking at.
     :param start_row: Represents where we are starting.
     :param last_row: Represents where we are ending.
+    :param session: Represents the WorkbookSession that holds the workbook. When it is given the workbook is only marked
+    to be saved, otherwise it gets saved right away.
+    :param record: Represents the StageRecord that the number of rows and cells written gets added to.
+    :param sku_column: Represents the index of the SKU column in a row, starting from zero, which is column A if it is
+    not given.
     """
-    wb = openpyxl.load_workbook(workbook_name)
-    ws = wb.active
-    green_fill = PatternFill(start_color='0000FF00',
-                             end_color='0000FF00',
-                             fill_type='solid')
-    yellow_fill = PatternFill(start_color='00FFFF00',
-                              end_color='00FFFF00',
-                              fill_type='solid')
-
-    for row in ws.iter_rows(start_row, last_row):
-        print("ROW: " + str(row))
-        row_id = str(row[0].value).strip().upper()  # This specifies column A in the row iteration
-        is_found = row_id in chain(*matched_list)
-        if is_found:
-            print("The ID: " + row_id + " was found!")
-            highlight_row(row, green_fill)
+    own_session = session is None
+    if own_session:
+        session = WorkbookSession()
+    ws = session.worksheet(workbook_name)
+
+    index = matched_list if isinstance(matched_list, SkuIndex) else SkuIndex(matched_list)
+
+    green_rows = []
+    yellow_rows = []
+    rows = ws.iter_rows(start_row, last_row, sku_column + 1, sku_column + 1, values_only=True)
+    for row_number, row in enumerate(rows, start_row):
+        row_id = str(row[0] if row else None).strip().upper()  # This is the SKU column in the row iteration
+        if row_id in index:
+            highlight_log.debug("The ID: %s was found!", row_id)
+            green_rows.append(row_number)
         else:
-            print("The ID: " + row_id + " was not found!")
-            highlight_row(row, yellow_fill)
-    wb.save(workbook_name)
-    print("Saved the workbook!")
-
-
-def highlight_row(row, pattern):
-    """
-    Highlight row
-
-    Helper method for highlighting each cell in a specific row. This function should not return anything. It should
-    just change the background for each cell in the specific row.
-
-    :param row: Represents the row we are looking at.
-    :param pattern: Represents the openpxl pattern style we wish to do to each cell in the row.
-    """
-    for cell in row:
-        cell.fill = pattern
-
-
-def import_excel_price_increase(properties, start, sheet, workbook, workbook_name):
+            highlight_log.debug("The ID: %s was not found!", row_id)
+            yellow_rows.append(row_number)
+    styles = session.styles(workbook_name)
+    cells_written = highlight_rows(ws, green_rows, GREEN, styles) + highlight_rows(ws, yellow_rows, YELLOW, styles)
+    highlight_log.info("Highlighted %s rows green and %s rows yellow in %s", len(green_rows), len(yellow_rows),
+                       workbook_name)
+    if record is not None:
+        record.add(last_row - start_row + 1, cells_written)
+    session.mark_dirty(workbook_name)
+    if own_session:
+        session.save()
+
+
+def import_excel_price_increase(properties, start, sheet, workbook, workbook_name, headers=None, throttle=0):
     """
     Really its just a method to import into excel
 
     This method focuses on importing the data into an excel sheet. This data focuses more on the products on our
-    website which have a higher price when compared to a competitor.
+    website which have a higher price when compared to a competitor. Every row is written in one go and the workbook is
+    saved once at the end. To write a brand new file, 'write_report' is faster.
 
     :param properties: Represents a list of lists, where each list contains properties about a product.
     :param start: This is the position to start importing in the excel file.
     :param sheet: This is the actual sheet of the workbook.
     :param workbook: This is the actual workbook.
     :param workbook_name: This is the name of the workbook, which is needed to save the file.
+    :param headers: These are the column headers that get written in the first row, nothing is written there if None.
+    :param throttle: This is how many seconds to wait after each row, which is not needed unless something else is
+    reading the file while it is being written.
     """
-    columns = ['A', 'B', 'C', 'D']
-    print("This is where we need to start: " + str(start))
-    for i in range(len(properties)):
-        row_pointer = start + i
-        print("position: " + str(row_pointer))
-        specific_properties = properties[i]
-        for j in range(len(specific_properties)):
-            value = specific_properties[j]
-            try:
-                column = columns[j]
-                sheet[column + str(row_pointer)] = value
-                time.sleep(.5)
-            except IndexError:
-                print("This usually is a sign that the site has updated their information!")
-        time.sleep(.5)
-        print("A row has been completed")
+    report_log.debug("This is where we need to start: %s", start)
+    if headers is not None:
+        for column, header in enumerate(headers, 1):
+            sheet.cell(1, column, header)
+    for row_pointer, specific_properties in enumerate(throttled(properties, throttle), start):
+        for column, value in enumerate(specific_properties, 1):
+            sheet.cell(row_pointer, column, value)
     workbook.save(workbook_name)
-    print("The workbook: " + workbook_name + " has been saved!")
+    report_log.info("The workbook: %s has been saved with %s rows!", workbook_name, len(properties))
 
 
 def price_update_changes_comparisons(site, price_increase, price_increase_columns, price_increase_indices,
-                                     master, master_columns, master_indices):
+                                     master, master_columns=None, master_indices=None, snapshot_name=None,
+                                     recorder=None):
     """
     Function for price increases between two files
 
@@ -266,123 +382,211 @@ def price_update_changes_comparisons(site, price_increase, price_increase_column
     :param master_columns: This represents the a list containing the columns for the sku number and the price
     Ex ['A, D'].
     :param master_indices: This represents a list containing the indices for start and finish in the excel file.
+    Any of the columns or indices that are None get found with 'profile_sheet', from the header names and the last row
+    that has data. Each excel file is only loaded once for the whole run, and the changed ones are saved once at the end.
+    :param snapshot_name: This represents the name of the PriceSnapshot file, usually the master name followed by
+    SNAPSHOT_EXTENSION. When it is given and still matches the master file and the updated file from the last run, the
+    run carries on from the updated file and only touches the prices that changed since then. The snapshot is saved
+    again at the end of the run. The rows highlighted green by the earlier runs stay green, so the updated file shows
+    every price changed since the master was exported, not only the ones changed by this run. When nothing changed
+    the updated file is not saved again.
+    :param recorder: This represents the RunRecorder that records the time and memory of each stage.
     """
+    recorder = recorder or NoRecorder()
+    updated_name = master + "_Updated.xlsx"
+    # The snapshot is closed when the run ends, even when it ends with an error
+    with PriceSnapshot(snapshot_name) if snapshot_name is not None else nullcontext() as snapshot:
+        incremental = snapshot is not None and snapshot.is_valid(master, updated_name)
+        working = updated_name if incremental else master
+
+        with WorkbookSession() as session:
+            with recorder.stage("load"):
+                session.workbook(price_increase)
+                session.workbook(working)
+
+            with recorder.stage("profile") as record:
+                if price_increase_columns is None or price_increase_indices is None:
+                    increase_profile = profile_sheet(session.worksheet(price_increase, 'info'),
+                                                     columns=price_increase_columns)
+                    pipeline_log.info("Profiled the price increase sheet: %s", increase_profile)
+                    price_increase_columns = price_increase_columns or increase_profile.columns
+                    price_increase_indices = price_increase_indices or increase_profile.indices
+                master_profile = profile_sheet(session.worksheet(working, 'info'), columns=master_columns)
+                pipeline_log.info("Profiled the master sheet: %s", master_profile)
+                master_columns = master_profile.columns
+                master_indices = master_indices or master_profile.indices
+                sku_column, price_column = master_profile.column_indices
+                record.add(master_profile.last_row)
+
+            with recorder.stage("collect") as record:
+                price_changes = collect_information(price_increase, 'info', price_increase_columns,
+                                                    price_increase_indices[0], price_increase_indices[1], session)
+                if incremental:
+                    master_index = SkuIndex(snapshot.records())
+                else:
+                    compare_information = collect_information(working, 'info', master_columns, master_indices[0],
+                                                              master_indices[1], session)
+                    master_index = SkuIndex(compare_information)
+                    record.add(len(compare_information))
+                record.add(len(price_changes))
+
+            with recorder.stage("match") as record:
+                matched = check_which_products_exist(price_changes, master_index)
+                if incremental:
+                    matched = snapshot.changed(matched)
+                record.add(len(price_changes))
+
+            with recorder.stage("highlight") as record:
+                high_light_price_increase(master_index, price_increase, price_increase_indices[0],
+                                          price_increase_indices[1], session, record,
+                                          column_index_from_string(price_increase_columns[0]) - 1)
+
+            # When no price changed since the snapshot the updated file is already right, so it is not saved again
+            update_master = bool(matched) or not incremental
+            if update_master:
+                pipeline_log.debug("We are going to update the master sheet now")
+                with recorder.stage("layout") as record:
+                    # The one layout is shared by 'update_price' and 'create_old_prod_dict', so it covers the old
+                    # layout too
+                    end_of_old = master_profile.old_layout_end
+                    layout_start = min(master_indices[0], 2) if end_of_old is not None else master_indices[0]
+                    layout_end = max(master_indices[1], end_of_old or 0)
+                    layout = parse_master_layout(session.worksheet(working), layout_start, layout_end, sku_column)
+                    old_dict = create_old_prod_dict(working, site, layout, session, end_of_old, sku_column)
+                    record.add(layout_end - layout_start + 1)
+
+                with recorder.stage("update") as record:
+                    update_price(matched, working, master_indices[0], master_indices[1], old_dict, layout, session,
+                                 updated_name, record, sku_column, price_column)
+            else:
+                pipeline_log.info("No prices changed since the snapshot, %s is left as it is", updated_name)
 
-    price_changes = collect_information(price_increase, 'info', price_increase_columns,
-                                        price_increase_indices[0], price_increase_indices[1])
-    compare_information = collect_information(master, 'info', master_columns, master_indices[0], master_indices[1])
-    matched = check_which_products_exist(price_changes, compare_information)
-    high_light_price_increase(matched, price_increase, price_increase_indices[0], price_increase_indices[1])
-    print("We are going to update the master sheet now")
-    old_dict = create_old_prod_dict(master, site)
-    update_price(matched, master, master_indices[0], master_indices[1], old_dict)
+            with recorder.stage("save"):
+                session.save()
 
+            if snapshot is not None and update_master:
+                with recorder.stage("snapshot") as record:
+                    snapshot.save(session.worksheet(working), layout, master, updated_name, price_column)
+                    record.add(len(layout.row_skus))
 
-def create_old_prod_dict(master_sheet, site):
+
+def create_old_prod_dict(master_sheet, site, layout=None, session=None, end_of_old=None, sku_column=SKU_COLUMN):
     """
     This function creates a dictionary of products that exist/existed on the old layout and their row number
     in the excel file. This dictionary will be used look up where the old skus are later
     :param site: Website we are updating
     :param master_sheet: Product sheet exported from BigC
+    :param layout: MasterLayout of the product sheet, which gets parsed here if it is not given
+    :param session: WorkbookSession to get the product sheet from, the file is loaded on its own if not given
+    :param end_of_old: Last row of the old layout, found with 'profile_sheet' if it is not given
+    :param sku_column: Index of the SKU column in a row, starting from zero
     :return:
     """
 
-    if site == "PSC":
-        end_of_old = 2331
-    elif site == "AOO":
-        end_of_old = 90
-    else:
+    if site not in OLD_LAYOUT_SITES:
         return None
 
-    wb = openpyxl.load_workbook(master_sheet)
-    ws = wb.active
+    if layout is None or end_of_old is None:
+        if session is None:
+            session = WorkbookSession()
+        ws = session.worksheet(master_sheet)
+        if end_of_old is None:
+            end_of_old = profile_sheet(ws, default_columns=['D', 'E']).old_layout_end
+        if end_of_old is None:
+            pipeline_log.info("There are no products on the old layout")
+            return {}
+        if layout is None:
+            layout = parse_master_layout(ws, 2, end_of_old, sku_column)
 
-    old_prod_cords = {}
-    row_count = 1
-
-    for row in ws.iter_rows(2, end_of_old):
-        row_count += 1
-        sku = row[3].value
-
-        if sku is not None:
-            tup = (str(sku).upper(), str(row_count))
-            temp_dict = {tup[0]: tup[1]}
-            # print("temp_dict: " + str(temp_dict))
-
-            old_prod_cords.update(temp_dict)
-
-    return old_prod_cords
+    return {sku: str(row_number) for sku, row_number in layout.sku_positions(2, end_of_old).items()}
 
 
 def compare_Scrape_Verus_Master(scrape_fileName, scrape_sheetName, scrape_columns, scrape_start, scrape_end,
-                                master_fileName, new_compare_file, new_compare_sheet):
+                                master_fileName, new_compare_file, new_compare_sheet, label=HIGHER_LABEL,
+                                scrape_prefix_length=3, throttle=0, recorder=None):
     """
     Function for getting a list of products with higher prices on the master sheet.
 
     Function for creating a new excel file, which would contain only the products that were found to have
     a higher price on the master sheet versus the scraped website. Therefore, these products should have a price
-    decrease.
+    decrease. Both files are streamed in read only mode and joined on the SKU number with 'compare_prices'.
 
     :param scrape_fileName: This will represent the file name with all of the scraped products.
     :param scrape_sheetName: This will represent the sheet name with all of the scraped products.
     :param scrape_columns:  This will represent an array of columns representing the price and the SKU number.
     :param scrape_start: This will represent the starting position in the excel scrape file.
     :param scrape_end: This will represent the ending position in the excel scrape file.
+    The scrape columns get found from the headers with 'find_columns' when they are None. A scrape start of None is the
+    row under the headers, and a scrape end of None reads to the end of the sheet. The master columns are always found
+    from the headers, falling back on columns A and B, and the whole master sheet is read. Either way each file is only
+    read once, and its empty rows are left out while it is read.
     :param master_fileName:  This will represent the name of the master sheet containing all of the products.
     :param new_compare_file:  This will represent the name of the file which will contain the products with higher
-    prices found on the master sheet when compared to the scrape.
+    prices found on the master sheet when compared to the scrape. When the file does not exist yet it gets created, and
+    when it ends with ".csv" the report is streamed to a csv file instead.
     :param new_compare_sheet: This will represent the sheet name of the compare file.
-    :return: This will not return anything, will fill the compare file, which was previously created.
+    :param label: This will represent the label that goes next to each product in the compare file.
+    :param scrape_prefix_length: This will represent how many characters get removed from the front of the scraped SKU
+    numbers before they are matched with the master sheet.
+    :param throttle: This will represent how many seconds to wait after writing each row of the compare file.
+    :param recorder: This will represent the RunRecorder that records the time and memory of each stage.
+    :return: This will return the list of Comparison that was put in the compare file.
     """
-    comparisons = []
-    scrape_collect = collect_information(scrape_fileName, scrape_sheetName, scrape_columns, scrape_start, scrape_end)
-    wb = openpyxl.load_workbook(master_fileName)  # Focusing on the master list
-    ws = wb.active
-    # We now know that the two collections are of size two in the form [price, ID]
-    for i in scrape_collect:  # The i represents products in our scrape_collect.
-        product_id = i[1][3:]  # product in scrape # After this comparison, get rid of this because it will be fixed.
-        print("scrape id: " + product_id)
-        local_comparison = []
-        local_comparison.append(product_id)
-        for row in ws.iter_rows(2, 1014):  # This is looping through the master sheet.
-            print("This is the id value: " + str(row[0].value))
-            if str(row[0].value).strip().upper() == product_id:  # compares master sheet to scrape
-                print("ID: " + str(row[0].value) + " was found and the price in master sheet is: " + str(row[1].value))
-                # compares the row price in master sheet to row price in scrape
-                comparePrice = row[1].value
-                scrape_price = i[0].replace('$', '').strip()
-                if str(comparePrice) == "*overflow*":
-                    print("This price was not available!")
-                    local_comparison.append("not available")
-                    break
-                if scrape_price == "SOLD OUT":
-                    print("This price was not available!")
-                    local_comparison.append("not available")
-                    break
-                locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
-                print(comparePrice)
-                print(locale.atof(scrape_price))
-                if comparePrice > locale.atof(scrape_price):
-                    print("In the most recent scrape this price decreased")
-                    local_comparison.append("Sandblasting HIGHER")  # Depends on what store
-                    local_comparison.append(comparePrice)
-                    local_comparison.append(locale.atof(scrape_price))
-                    break
-            else:
-                print("This is a case that we do not care about")
-        if len(local_comparison) <= 2:
-            print("We will not be adding this comparison to the list!")
+    recorder = recorder or NoRecorder()
+    with WorkbookSession(read_only=True) as source:
+        with recorder.stage("profile"):
+            if scrape_columns is None:
+                # The scrape columns are [price, ID]
+                scrape_columns = find_columns(source.worksheet(scrape_fileName, scrape_sheetName))[::-1]
+            master_columns = find_columns(source.worksheet(master_fileName), default_columns=['A', 'B'])
+            pipeline_log.info("Comparing the scrape columns %s with the master columns %s", scrape_columns,
+                              master_columns)
+
+        # Both files are streamed while they are joined, so reading them is part of the compare stage.
+        with recorder.stage("compare") as record:
+            scrape_records = counted(iter_information(scrape_fileName, scrape_sheetName, scrape_columns[::-1],
+                                                      scrape_start or 2, scrape_end, source), record)
+            master_records = counted(iter_information(master_fileName, None, master_columns, 2, None, source), record)
+            comparisons = compare_prices(scrape_records, master_records, label,
+                                         scrape_sku_rule(scrape_prefix_length))
+
+    with recorder.stage("report") as record:
+        if os.path.exists(new_compare_file) and not new_compare_file.lower().endswith(".csv"):
+            wb = openpyxl.load_workbook(new_compare_file)
+            sheet = wb[new_compare_sheet]
+            import_excel_price_increase(comparisons, 2, sheet, wb, new_compare_file, REPORT_HEADERS, throttle)
         else:
-            comparisons.append(local_comparison)
-        print("Moving onto the next product in the scrape")
-    wb = openpyxl.load_workbook(new_compare_file)
-    sheet = wb[new_compare_sheet]
-    import_excel_price_increase(comparisons, 2, sheet, wb, new_compare_file)
+            write_report(comparisons, new_compare_file, REPORT_HEADERS, new_compare_sheet, throttle)
+        record.add(len(comparisons), len(comparisons) * len(REPORT_HEADERS))
+    return comparisons
 
 
 if __name__ == '__main__':
-    # TODO: Don't forget to change the row numbers per file before you run
-    #  AND the site you will be updating
-    price_update_changes_comparisons("PSC", "PriceIncreases/BS BigC Price Update Mar '22 (Increase)(PSC).xlsx", ['A', 'C'], [2, 135],
-                                     "MasterSheets/products-2022-03-11(testing).xlsx", ['D', 'E'], [2, 5194])
-    # testng git
+    parser = argparse.ArgumentParser(description="Update the prices of the master sheet with a price increase sheet.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log the details of every row")
+    parser.add_argument("-s", "--snapshot", action="store_true",
+                        help="keep a snapshot next to the master file and only update the prices that changed, the "
+                             "green rows of the updated file build up over every run since the master was exported")
+    parser.add_argument("-r", "--report", default=None,
+                        help="write the time, rows, cells and memory of each stage to this json file, the memory is "
+                             "measured with tracemalloc where the peak memory of the process is not available")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also measure the memory of each stage with tracemalloc, which slows the run down")
+    parser.add_argument("--profile", action="store_true",
+                        help="save a cProfile of the slowest stage next to the report")
+    arguments = parser.parse_args()
+    if (arguments.trace_memory or arguments.profile) and arguments.report is None:
+        parser.error("--trace-memory and --profile need --report to write their results to")
+    configure_logging(-1 if arguments.quiet else 1 if arguments.verbose else 0)
+
+    # TODO: Don't forget to change the file names AND the site you will be updating. The columns and row numbers get
+    #  found from the headers of each sheet, pass them in to override that.
+    master_file = "MasterSheets/products-2022-03-11(testing).xlsx"
+    with RunRecorder(arguments.trace_memory, arguments.profile) if arguments.report else nullcontext() as run_recorder:
+        price_update_changes_comparisons("PSC", "PriceIncreases/BS BigC Price Update Mar '22 (Increase)(PSC).xlsx", ['A', 'C'], None,
+                                         master_file,
+                                         snapshot_name=master_file + SNAPSHOT_EXTENSION if arguments.snapshot else None,
+                                         recorder=run_recorder)
+        if run_recorder is not None:
+            run_recorder.write_report(arguments.report)
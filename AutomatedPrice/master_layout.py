@@ -0,0 +1,131 @@
+"""Layout of the products in the master sheet.
+
+The BigCommerce export lists every product on a "Product" row. Products with options are followed by their "SKU" rows,
+one for each option, and then by their "Rule" rows, which is where the "[FIXED]" variant prices are. The master sheet is
+read once and turned into blocks of rows, one for each product. After that, updating the price of a product is a direct
+cell access instead of another trip through the whole sheet, or a walk back up the rows.
+"""
+from sku_index import normalize_sku
+
+# Where the columns are in a BigCommerce export, used when they are not found from the headers with 'profile_sheet'
+SKU_COLUMN = 3  # Column D, the Product Code/SKU
+PRICE_COLUMN = 4  # Column E, the Price
+
+
+def is_fixed_price(value):
+    """
+    :param value: Represents the value of a price cell.
+    :return: This will return True when the price is a "[FIXED]" variant price.
+    """
+    return "[FIXED]" in str(value)
+
+
+class ProductBlock:
+    """
+    One product of the master sheet and the rows that belong to it.
+
+    product_row is None for rows found before the first Product row, which happens when a range starts in the middle of
+    a product. sku_rows maps the SKU number of each SKU row to its row number, and variant_rows maps the SKU number of
+    each Rule row to its row numbers.
+    """
+
+    def __init__(self, product_row=None, product_sku=None):
+        self.product_row = product_row
+        self.product_sku = product_sku
+        self.sku_rows = {}
+        self.variant_rows = {}
+
+    def sku_row(self, sku):
+        """
+        :param sku: Represents the normalized SKU number of a variant.
+        :return: This will return the row of the SKU row with that SKU number, or None if there is not one.
+        """
+        if sku in self.sku_rows:
+            return self.sku_rows[sku]
+        if sku == self.product_sku:
+            return self.product_row
+        return None
+
+
+class MasterLayout:
+    """
+    Every product block of the master sheet, with lookups from a SKU number or a row number to where it belongs.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.rows_by_sku = {}
+        self.row_skus = {}
+        self.block_of_row = {}
+
+    def rows(self, sku):
+        """
+        :param sku: Represents the SKU number we are looking for.
+        :return: This will return the list of row numbers the SKU number is on, which is empty if it is not found.
+        """
+        return self.rows_by_sku.get(normalize_sku(sku), [])
+
+    def parent_row(self, row_number):
+        """
+        :param row_number: Represents the row we are looking at.
+        :return: This will return the row number of the Product row it belongs to, or None if there is not one.
+        """
+        block = self.block_of_row.get(row_number)
+        return block.product_row if block is not None else None
+
+    def sku_row(self, row_number):
+        """
+        :param row_number: Represents the row number of a variant.
+        :return: This will return the row number of the SKU row it belongs to, or None if there is not one.
+        """
+        block = self.block_of_row.get(row_number)
+        if block is None or row_number not in self.row_skus:
+            return None
+        return block.sku_row(self.row_skus[row_number])
+
+    def sku_positions(self, first_row, last_row):
+        """
+        Get where every SKU number is between two rows.
+
+        :param first_row: Represents where we are starting.
+        :param last_row: Represents where we are ending.
+        :return: This will return a dictionary of SKU numbers and their row number. When a SKU number is on more than one
+        row, the last one is kept.
+        """
+        return {sku: row_number for row_number, sku in self.row_skus.items() if first_row <= row_number <= last_row}
+
+
+def parse_master_layout(ws, start_row, last_row, sku_column=SKU_COLUMN):
+    """
+    Parse the master sheet
+
+    Goes through the master sheet a single time and splits it into product blocks, remembering where every SKU number
+    is along the way.
+
+    :param ws: Represents the worksheet of the master sheet.
+    :param start_row: Represents where we are starting.
+    :param last_row: Represents where we are ending.
+    :param sku_column: Represents the index of the SKU column in a row, starting from zero.
+    :return: This will return a MasterLayout.
+    """
+    layout = MasterLayout()
+    block = None
+    for row_number, row in enumerate(ws.iter_rows(start_row, last_row, values_only=True), start_row):
+        item_type = str(row[0]).strip()
+        sku_value = row[sku_column]
+        sku = normalize_sku(sku_value) if sku_value is not None else None
+
+        if item_type == "Product" or block is None:
+            block = ProductBlock(row_number, sku) if item_type == "Product" else ProductBlock()
+            layout.blocks.append(block)
+        layout.block_of_row[row_number] = block
+
+        if sku is None:
+            continue
+        if item_type == "SKU":
+            block.sku_rows[sku] = row_number
+        elif item_type == "Rule":
+            block.variant_rows.setdefault(sku, []).append(row_number)
+        layout.row_skus[row_number] = sku
+        layout.rows_by_sku.setdefault(sku, []).append(row_number)
+    return layout
@@ -0,0 +1,74 @@
+"""Comparing the prices of a scrape with the prices on the master sheet.
+
+The master sheet is turned into a dictionary of SKU numbers and prices once, then the scrape is gone through once,
+looking each product up in that dictionary. That way the work grows with the size of the two files added together,
+instead of multiplied together like it did when the whole master sheet was looped through for every scraped product.
+"""
+import logging
+import math
+from collections import namedtuple
+
+from price_table import OVERFLOW, SOLD_OUT, PriceTable
+from sku_index import normalize_sku
+
+Comparison = namedtuple("Comparison", ["sku", "label", "master_price", "scrape_price", "percent_difference"])
+
+HIGHER_LABEL = "Sandblasting HIGHER"  # Depends on what store
+
+log = logging.getLogger("AutomatedPrice.compare")
+
+
+def scrape_sku_rule(prefix_length=0):
+    """
+    Make the rule for turning a scraped SKU number into a master sheet SKU number.
+
+    Some sites put a few characters in front of the SKU numbers, like the manufacturer's code, which have to be removed
+    before they can match the master sheet.
+
+    :param prefix_length: Represents how many characters get removed from the start of the scraped SKU number.
+    :return: This will return a function that takes a scraped SKU number and returns the normalized SKU number.
+    """
+    def rule(value):
+        return normalize_sku(value)[prefix_length:]
+    return rule
+
+
+def compare_prices(scrape_records, master_records, label=HIGHER_LABEL, sku_rule=None):
+    """
+    Find the products that have a higher price on the master sheet than on the scrape.
+
+    :param scrape_records: Represents the PriceRecords of the scraped products, like the ones 'iter_information' yields.
+    :param master_records: Represents the PriceRecords of the master sheet products. When a SKU number is on more than
+    one row, the first one is used.
+    :param label: Represents the label put in the second column of the report.
+    :param sku_rule: Represents the function that turns a scraped SKU number into a master sheet SKU number.
+    :return: This will return a list of Comparison, one for each product that is higher on the master sheet.
+    """
+    if sku_rule is None:
+        sku_rule = scrape_sku_rule()
+
+    master_prices = {}
+    for record in master_records:
+        master_prices.setdefault(normalize_sku(record.sku), record.price)
+
+    skus = []
+    scrape_prices = []
+    matched_prices = []
+    for record in scrape_records:
+        sku = sku_rule(record.sku)
+        if sku not in master_prices:
+            continue
+        skus.append(sku)
+        scrape_prices.append(record.price)
+        matched_prices.append(master_prices[sku])
+
+    scrape_table = PriceTable.from_values(skus, scrape_prices)
+    master_table = PriceTable.from_values(skus, matched_prices)
+    higher = master_table.higher_than(scrape_table)
+    differences = scrape_table.percent_change(master_table)
+    log.info("Found %s scraped products on the master sheet, %s have a higher price on the master sheet and %s were not "
+             "available", len(skus), len(higher), scrape_table.count(SOLD_OUT) + master_table.count(OVERFLOW))
+
+    return [Comparison(skus[position], label, master_table.prices[position], scrape_table.prices[position],
+                       None if math.isnan(differences[position]) else round(differences[position], 2))
+            for position in higher]
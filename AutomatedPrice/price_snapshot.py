@@ -0,0 +1,145 @@
+"""Snapshot of the prices that were last applied to a master sheet.
+
+After a price update, the SKU number, row, price and "[FIXED]" flag of every row of the updated master sheet is saved in
+a small SQLite file next to it, along with a hash of the master file and of the updated file. The next run against the
+same master file can then carry on from the updated file, and only touch the rows whose price actually changed since
+then. When either file no longer matches its hash, the snapshot is thrown away and the run updates everything again.
+"""
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+
+from master_layout import PRICE_COLUMN
+from price_table import FIXED, parse_price
+from sku_index import normalize_sku
+
+log = logging.getLogger("AutomatedPrice.snapshot")
+
+SNAPSHOT_EXTENSION = ".snapshot.sqlite"
+
+
+def file_hash(file_name):
+    """
+    :param file_name: Represents the name of the file.
+    :return: This will return the sha256 hash of the file, or None if the file does not exist.
+    """
+    if not os.path.exists(file_name):
+        return None
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PriceSnapshot:
+    """
+    The last applied state of a master sheet, stored in SQLite.
+    """
+
+    def __init__(self, snapshot_name):
+        """
+        :param snapshot_name: Represents the name of the SQLite file, which gets created if it does not exist.
+        """
+        self.snapshot_name = snapshot_name
+        self.connection = sqlite3.connect(snapshot_name)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS prices (sku TEXT, row_number INTEGER PRIMARY KEY, "
+                                "price REAL, fixed INTEGER)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS prices_sku ON prices (sku)")
+        self.prices = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def meta(self, key):
+        found = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return found[0] if found is not None else None
+
+    def is_valid(self, master_name, updated_name):
+        """
+        Check that the snapshot still belongs to the master file and the updated file.
+
+        :param master_name: Represents the name of the master file that was exported.
+        :param updated_name: Represents the name of the updated file the last run saved.
+        :return: This will return True when both files are the same as when the snapshot was saved.
+        """
+        master_hash = self.meta("master_hash")
+        valid = (master_hash is not None and master_hash == file_hash(master_name)
+                 and self.meta("updated_hash") == file_hash(updated_name))
+        if not valid and master_hash is not None:
+            log.info("The snapshot %s is out of date and will be rebuilt", self.snapshot_name)
+        return valid
+
+    def load(self):
+        """
+        Load every price of the snapshot into memory.
+
+        :return: This will return a dictionary of SKU numbers and the set of prices on their rows.
+        """
+        if self.prices is None:
+            self.prices = {}
+            for sku, price in self.connection.execute("SELECT sku, price FROM prices WHERE price IS NOT NULL"):
+                self.prices.setdefault(sku, set()).add(price)
+        return self.prices
+
+    def records(self):
+        """
+        :return: This will return a list where each element is a list containing a SKU number of the snapshot and its
+        price, like the list 'collect_information' returns. A SKU number whose rows have no price is kept, with a price
+        of "None", so it still matches like it does in a full run.
+        """
+        return [[sku, str(price)] for sku, price in
+                self.connection.execute("SELECT sku, MIN(price) FROM prices GROUP BY sku")]
+
+    def changed(self, matched_list):
+        """
+        Find the new prices that are not already applied.
+
+        :param matched_list: Represents a list of lists where each element has a SKU number and the new price. When a SKU
+        number is in the list more than once, the last price is the one that gets applied.
+        :return: This will return the elements of the list whose price is not the price of every row with that SKU number
+        in the snapshot.
+        """
+        prices = self.load()
+        latest = {}
+        for i in matched_list:
+            latest[normalize_sku(i[0])] = i
+        changed = []
+        for sku, i in latest.items():
+            new_price, status = parse_price(i[1])
+            if prices.get(sku) != {new_price}:
+                changed.append(i)
+        log.info("%s out of %s prices changed since the snapshot", len(changed), len(matched_list))
+        return changed
+
+    def save(self, ws, layout, master_name, updated_name, price_column=PRICE_COLUMN):
+        """
+        Replace the snapshot with the state of an updated master sheet.
+
+        :param ws: Represents the worksheet of the updated master sheet.
+        :param layout: Represents the MasterLayout of the master sheet.
+        :param master_name: Represents the name of the master file that was exported.
+        :param updated_name: Represents the name of the updated file that was saved.
+        :param price_column: Represents the index of the price column in a row, starting from zero.
+        """
+        rows = []
+        for row_number, sku in layout.row_skus.items():
+            price, status = parse_price(ws.cell(row_number, price_column + 1).value)
+            rows.append((sku, row_number, None if math.isnan(price) else price, int(status == FIXED)))
+        with self.connection:
+            self.connection.execute("DELETE FROM prices")
+            self.connection.executemany("INSERT INTO prices VALUES (?, ?, ?, ?)", rows)
+            self.connection.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                        [("master_hash", file_hash(master_name)),
+                                         ("updated_hash", file_hash(updated_name))])
+        self.prices = None
+        log.info("Saved %s rows to the snapshot %s", len(rows), self.snapshot_name)
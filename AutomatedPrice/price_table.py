@@ -0,0 +1,141 @@
+"""Prices parsed a whole column at a time.
+
+A PriceTable keeps the SKU numbers, the prices and the status of each price in three parallel columns. The prices are
+stored in an array of floats instead of a list of cells, and all of the parsing, comparing and percentage changes are
+done over the whole column at once instead of with checks on every single row.
+"""
+import math
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+
+AVAILABLE = 0
+SOLD_OUT = 1
+OVERFLOW = 2
+FIXED = 3
+MISSING = 4
+STATUS_NAMES = {AVAILABLE: "available", SOLD_OUT: "sold out", OVERFLOW: "overflow", FIXED: "fixed", MISSING: "missing"}
+
+CENT = Decimal("0.01")
+# Characters that show up around a price but are not part of the number, like "$1,234.00".
+PRICE_NOISE = str.maketrans("", "", "$, \t\r\n")
+
+
+def round_price(value):
+    """
+    Round a price to the cent, with halves going up like they do in excel.
+
+    :param value: Represents the price as a number.
+    :return: This will return the rounded price as a float.
+    """
+    return float(Decimal(repr(float(value))).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def parse_price(value):
+    """
+    Parse one price cell
+
+    :param value: Represents the value of the price cell, which can be a number or text like "$52.00", "SOLD OUT",
+    "*overflow*" or "[FIXED]106.84".
+    :return: This will return a tuple of the rounded price, which is nan when there is not one, and its status.
+    """
+    if value is None:
+        return math.nan, MISSING
+    if isinstance(value, (int, float)):
+        return round_price(value), AVAILABLE
+    text = str(value).strip()
+    status = AVAILABLE
+    if text.upper() == "SOLD OUT":
+        return math.nan, SOLD_OUT
+    if text == "*overflow*":
+        return math.nan, OVERFLOW
+    if text.startswith("[FIXED]"):
+        text = text[len("[FIXED]"):]
+        status = FIXED
+    try:
+        return round_price(float(text.translate(PRICE_NOISE))), status
+    except ValueError:
+        return math.nan, MISSING
+
+
+def parse_prices(values):
+    """
+    Parse a whole column of price cells
+
+    :param values: Represents the values of the price cells.
+    :return: This will return a tuple of an array of prices and an array of statuses, in the same order as the values.
+    """
+    parsed = [parse_price(value) for value in values]
+    return array("d", [price for price, status in parsed]), array("b", [status for price, status in parsed])
+
+
+class PriceTable:
+    """
+    SKU numbers, prices and price statuses stored as columns.
+
+    A price counts as usable when its status is available or fixed, since a "[FIXED]" price is still a real price.
+    """
+
+    def __init__(self, skus, prices, statuses):
+        self.skus = list(skus)
+        self.prices = prices
+        self.statuses = statuses
+
+    @classmethod
+    def from_values(cls, skus, values):
+        """
+        Build a PriceTable from SKU numbers and the raw values of their price cells.
+
+        :param skus: Represents the SKU numbers.
+        :param values: Represents the raw values of the price cells, in the same order as the SKU numbers.
+        :return: This will return a PriceTable.
+        """
+        prices, statuses = parse_prices(values)
+        return cls(skus, prices, statuses)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a PriceTable from a list where each element starts with a SKU number and a price.
+
+        :param records: Represents the list of records, like the one 'collect_information' returns.
+        :return: This will return a PriceTable.
+        """
+        return cls.from_values([record[0] for record in records], [record[1] for record in records])
+
+    def __len__(self):
+        return len(self.skus)
+
+    def usable(self):
+        """
+        :return: This will return a list of booleans telling whether each price can be compared.
+        """
+        return [status == AVAILABLE or status == FIXED for status in self.statuses]
+
+    def count(self, status):
+        """
+        :param status: Represents the status we are counting.
+        :return: This will return how many prices have the status.
+        """
+        return self.statuses.count(status)
+
+    def higher_than(self, other):
+        """
+        Compare each price with the price in the same position of another table.
+
+        :param other: Represents the PriceTable we are comparing to, in the same order as this one.
+        :return: This will return a list of the positions where both prices are usable and this price is higher.
+        """
+        return [position for position, (mine, theirs, both) in
+                enumerate(zip(self.prices, other.prices, map(all, zip(self.usable(), other.usable()))))
+                if both and mine > theirs]
+
+    def percent_change(self, new_prices):
+        """
+        Get the percentage change from each price to the price in the same position of another table.
+
+        :param new_prices: Represents the PriceTable with the new prices, in the same order as this one.
+        :return: This will return an array with the percentage changes, nan where either price is not usable or the old
+        price is zero.
+        """
+        return array("d", [(new - old) / old * 100 if both and old else math.nan for old, new, both in
+                           zip(self.prices, new_prices.prices, map(all, zip(self.usable(), new_prices.usable())))])
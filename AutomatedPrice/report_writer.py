@@ -0,0 +1,81 @@
+"""Writing reports of products to a file.
+
+A report is written a whole row at a time into a new workbook opened in openpyxl's write only mode, which never keeps
+more than one row in memory, and it is saved once at the end. Very large reports can be written as a .csv file instead,
+which is streamed straight to the disk.
+"""
+import csv
+import logging
+import time
+
+import openpyxl
+
+log = logging.getLogger("AutomatedPrice.report")
+
+REPORT_HEADERS = ["SKU", "Status", "Master Price", "Scrape Price", "Difference %"]
+
+
+def throttled(rows, throttle):
+    """
+    Go through the rows, waiting between each one.
+
+    Only needed when something else is reading the file while it is being written. A throttle of zero does not wait at
+    all.
+
+    :param rows: Represents the rows of the report.
+    :param throttle: Represents how many seconds to wait after each row.
+    :return: This will yield each row.
+    """
+    for row in rows:
+        yield row
+        if throttle:
+            time.sleep(throttle)
+
+
+def write_report(rows, file_name, headers=REPORT_HEADERS, sheet_name="info", throttle=0):
+    """
+    Write a report to a new file
+
+    :param rows: Represents the rows of the report, where each row is a list of values.
+    :param file_name: Represents the name of the file, which is written as a csv file when it ends with ".csv".
+    :param headers: Represents the column headers that go in the first row, nothing is written there if it is None.
+    :param sheet_name: Represents the name of the sheet in an excel report.
+    :param throttle: Represents how many seconds to wait after each row.
+    :return: This will return how many rows were written, not counting the headers.
+    """
+    if file_name.lower().endswith(".csv"):
+        return write_csv_report(rows, file_name, headers, throttle)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    if headers is not None:
+        ws.append(list(headers))
+    count = 0
+    for row in throttled(rows, throttle):
+        ws.append(list(row))
+        count += 1
+    wb.save(file_name)
+    log.info("Wrote %s rows to the report: %s", count, file_name)
+    return count
+
+
+def write_csv_report(rows, file_name, headers=REPORT_HEADERS, throttle=0):
+    """
+    Write a report to a new csv file, one row at a time.
+
+    :param rows: Represents the rows of the report, where each row is a list of values.
+    :param file_name: Represents the name of the csv file.
+    :param headers: Represents the column headers that go in the first row, nothing is written there if it is None.
+    :param throttle: Represents how many seconds to wait after each row.
+    :return: This will return how many rows were written, not counting the headers.
+    """
+    count = 0
+    with open(file_name, "w", newline="") as report:
+        writer = csv.writer(report)
+        if headers is not None:
+            writer.writerow(headers)
+        for row in throttled(rows, throttle):
+            writer.writerow(row)
+            count += 1
+    log.info("Wrote %s rows to the report: %s", count, file_name)
+    return count
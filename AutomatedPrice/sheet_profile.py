@@ -0,0 +1,140 @@
+"""Finding where the data is in an excel sheet.
+
+Instead of typing the row numbers and column letters by hand before every run, a sheet gets profiled once. The SKU and
+price columns are found by their header name, and the last row is the last one that actually has a SKU number or a
+price, so the empty rows that excel likes to keep at the bottom of a sheet are skipped.
+"""
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from sku_index import OLD_SUFFIX
+
+# Header names are compared without case, the first one found in the header row is used.
+SKU_HEADERS = ("Product Code/SKU", "Product SKU", "SKU", "MPN", "Part Number", "Item Number")
+PRICE_HEADERS = ("Price", "Sell", "Sell Price", "New Price", "New Cost")
+
+# Sites whose master sheet still has products on the old layout, with their SKU numbers ending in "-OLD".
+OLD_LAYOUT_SITES = ("PSC", "AOO")
+
+
+class SheetProfile:
+    """
+    Where the data is in a sheet.
+
+    The columns are letters, like the ones used everywhere else in this program, and the rows are the first and last rows
+    with data under the header. old_layout_end is the last row with a SKU number ending in "-OLD", or None if there is
+    not one.
+    """
+
+    def __init__(self, header_row, sku_column, price_column, first_row, last_row, old_layout_end):
+        self.header_row = header_row
+        self.sku_column = sku_column
+        self.price_column = price_column
+        self.first_row = first_row
+        self.last_row = last_row
+        self.old_layout_end = old_layout_end
+
+    @property
+    def columns(self):
+        """
+        :return: This will return the SKU and price column letters, like the columns given to 'collect_information'.
+        """
+        return [self.sku_column, self.price_column]
+
+    @property
+    def column_indices(self):
+        """
+        :return: This will return the indices of the SKU and price columns in a row, starting from zero, like the
+        columns given to 'parse_master_layout' and 'update_price'.
+        """
+        return [column_index_from_string(column) - 1 for column in self.columns]
+
+    @property
+    def indices(self):
+        """
+        :return: This will return the first and last rows, like the indices given to 'price_update_changes_comparisons'.
+        """
+        return [self.first_row, self.last_row]
+
+    def __repr__(self):
+        return ("SheetProfile(columns=" + str(self.columns) + ", indices=" + str(self.indices) + ", old_layout_end="
+                + str(self.old_layout_end) + ")")
+
+
+def find_column(header_values, names, default=None):
+    """
+    Find a column by its header
+
+    :param header_values: Represents the values of the header row.
+    :param names: Represents the header names we are looking for, in the order they should be tried.
+    :param default: Represents the column letter to use if none of the names are found.
+    :return: This will return the column letter.
+    """
+    headers = [str(value).strip().lower() for value in header_values]
+    for name in names:
+        if name.lower() in headers:
+            return get_column_letter(headers.index(name.lower()) + 1)
+    if default is None:
+        raise ValueError("Could not find a column named any of: " + str(list(names)))
+    return default
+
+
+def find_columns(ws, sku_headers=SKU_HEADERS, price_headers=PRICE_HEADERS, default_columns=None, header_row=1):
+    """
+    Find the SKU and price columns from the header row alone, without going through the rest of the sheet.
+
+    :param ws: Represents the worksheet.
+    :param sku_headers: Represents the header names the SKU column could have.
+    :param price_headers: Represents the header names the price column could have.
+    :param default_columns: Represents the SKU and price column letters to use if the headers are not found.
+    :param header_row: Represents the row with the headers.
+    :return: This will return a list of the SKU and price column letters.
+    """
+    default_sku, default_price = default_columns if default_columns is not None else (None, None)
+    header_values = next(ws.iter_rows(header_row, header_row, values_only=True), ())
+    return [find_column(header_values, sku_headers, default_sku),
+            find_column(header_values, price_headers, default_price)]
+
+
+def profile_sheet(ws, sku_headers=SKU_HEADERS, price_headers=PRICE_HEADERS, default_columns=None, header_row=1,
+                  columns=None):
+    """
+    Profile a sheet
+
+    Reads the header row to find the SKU and price columns, then goes through those two columns a single time, up to the
+    'max_row' of the sheet, to find the last row with data and the last row on the old layout. Works with sheets loaded
+    in read only mode too.
+
+    :param ws: Represents the worksheet we are profiling.
+    :param sku_headers: Represents the header names the SKU column could have.
+    :param price_headers: Represents the header names the price column could have.
+    :param default_columns: Represents the SKU and price column letters to use if the headers are not found.
+    :param header_row: Represents the row with the headers.
+    :param columns: Represents the SKU and price column letters to use instead of looking at the headers, so the last
+    row is found from the columns that will actually be read.
+    :return: This will return a SheetProfile.
+    """
+    if columns is None:
+        columns = find_columns(ws, sku_headers, price_headers, default_columns, header_row)
+    sku_column, price_column = columns[:2]
+
+    sku_index = column_index_from_string(sku_column)
+    price_index = column_index_from_string(price_column)
+    first_column = min(sku_index, price_index)
+    sku_offset = sku_index - first_column
+    price_offset = price_index - first_column
+
+    first_row = header_row + 1
+    last_row = header_row
+    old_layout_end = None
+    if ws.max_row is None or ws.max_row >= first_row:
+        rows = ws.iter_rows(first_row, ws.max_row, first_column, max(sku_index, price_index), values_only=True)
+        for row_number, row in enumerate(rows, first_row):
+            sku = row[sku_offset] if sku_offset < len(row) else None
+            price = row[price_offset] if price_offset < len(row) else None
+            if sku is None and price is None:
+                continue
+            last_row = row_number
+            if str(sku).strip().upper().endswith(OLD_SUFFIX):
+                old_layout_end = row_number
+
+    return SheetProfile(header_row, sku_column, price_column, first_row, last_row, old_layout_end)
@@ -0,0 +1,142 @@
+"""SKU index used for matching price changes against the master sheet.
+
+Instead of flattening and scanning the whole master list for every price change, the master list is turned into a
+dictionary once. The keys are normalized SKU numbers, so a lookup is a single hash access and a price string can never
+be mistaken for a SKU number.
+"""
+
+OLD_SUFFIX = "-OLD"
+
+
+def normalize_sku(value, strip=True, upper=True, drop_old_suffix=False):
+    """
+    Normalize a SKU number
+
+    Helper method for turning a SKU cell value into the key used by the index. By default this matches what
+    'collect_information' has always done, which is stripping the whitespace and making the value uppercase.
+
+    :param value: Represents the value of the SKU cell.
+    :param strip: Represents whether the surrounding whitespace should be removed.
+    :param upper: Represents whether the SKU should be made uppercase.
+    :param drop_old_suffix: Represents whether a trailing "-OLD" should be removed, so an old layout product matches the
+    new one.
+    :return: This will return the SKU as a normalized string.
+    """
+    sku = str(value)
+    if strip:
+        sku = sku.strip()
+    if upper:
+        sku = sku.upper()
+    if drop_old_suffix and sku.upper().endswith(OLD_SUFFIX):
+        sku = sku[:-len(OLD_SUFFIX)]
+    return sku
+
+
+def has_price(record):
+    """
+    :param record: Represents an element with a SKU number and, optionally, a price.
+    :return: This will return False when the element has an empty price, like the SKU rows of a BigCommerce export.
+    """
+    return len(record) < 2 or str(record[1]).strip() not in ("", "None")
+
+
+class SkuIndex:
+    """
+    Index of SKU numbers
+
+    Built once from the output of 'collect_information', where each element is a list with the SKU number first. Every
+    normalized SKU points to the list of elements that had it, which is how SKU numbers found more than once get
+    reported as duplicates. In a BigCommerce export every option SKU number is on its SKU row and on its Rule row, but
+    only the Rule row has a price, so elements without a price are left out of the duplicates.
+    """
+
+    def __init__(self, records, strip=True, upper=True, drop_old_suffix=False):
+        """
+        :param records: Represents a list of lists where each element has a SKU number and a price.
+        :param strip: Represents whether the surrounding whitespace should be removed from the SKU.
+        :param upper: Represents whether the SKU should be made uppercase.
+        :param drop_old_suffix: Represents whether a trailing "-OLD" should be removed from the SKU.
+        """
+        self.strip = strip
+        self.upper = upper
+        self.drop_old_suffix = drop_old_suffix
+        self.records = {}
+        for record in records:
+            self.records.setdefault(self.key(record[0]), []).append(record)
+
+    def key(self, value):
+        """
+        Normalize a value with the same settings used to build the index.
+
+        :param value: Represents the value of the SKU cell.
+        :return: This will return the normalized SKU.
+        """
+        return normalize_sku(value, self.strip, self.upper, self.drop_old_suffix)
+
+    def __contains__(self, value):
+        return self.key(value) in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, value):
+        """
+        Get every element that has the given SKU number.
+
+        :param value: Represents the SKU number we are looking for.
+        :return: This will return a list of elements, which is empty when the SKU is not in the index.
+        """
+        return self.records.get(self.key(value), [])
+
+    @property
+    def duplicates(self):
+        """
+        :return: This will return the set of SKU numbers that were found on more than one row with a price.
+        """
+        return {sku for sku, found in self.records.items()
+                if len(found) > 1 and sum(1 for record in found if has_price(record)) > 1}
+
+    def match(self, first_list):
+        """
+        Split a list into the elements that are in the index and the ones that are not.
+
+        :param first_list: Represents a list filled with elements that contain a SKU number and a price.
+        :return: This will return a SkuMatch holding the matched and unmatched elements.
+        """
+        matched = []
+        unmatched = []
+        for i in first_list:
+            if i[0] in self:
+                matched.append(i)
+            else:
+                unmatched.append(i)
+        return SkuMatch(matched, unmatched, self)
+
+
+class SkuMatch:
+    """
+    Result of matching a list against a SkuIndex.
+
+    The matched and unmatched lists keep the elements in their original order. The sets hold the normalized SKU numbers
+    so they can be used for quick lookups.
+    """
+
+    def __init__(self, matched, unmatched, index):
+        self.matched = matched
+        self.unmatched = unmatched
+        self.index = index
+
+    @property
+    def matched_skus(self):
+        return {self.index.key(i[0]) for i in self.matched}
+
+    @property
+    def unmatched_skus(self):
+        return {self.index.key(i[0]) for i in self.unmatched}
+
+    @property
+    def duplicate_skus(self):
+        """
+        :return: This will return the matched SKU numbers that are found more than once in the index.
+        """
+        return self.matched_skus & self.index.duplicates
@@ -0,0 +1,107 @@
+"""Workbooks shared between the steps of a price update.
+
+Loading an excel file is the slowest part of a run, so a WorkbookSession loads each file a single time and hands the
+same workbook to every function that asks for it. Functions that change a workbook mark it as dirty, and every dirty
+workbook gets saved once when the session is saved.
+"""
+import logging
+
+import openpyxl
+
+from highlight_styles import HighlightStyles
+
+log = logging.getLogger("AutomatedPrice.session")
+
+
+class WorkbookSession:
+    """
+    Cache of loaded workbooks for one run.
+
+    Can be used as a context manager, in which case the dirty workbooks are saved when the block finishes without an
+    error. A read only session opens every file in openpyxl's read only mode, which streams the rows instead of loading
+    the whole file, but none of its workbooks can be changed or saved.
+    """
+
+    def __init__(self, read_only=False):
+        self.read_only = read_only
+        self.workbooks = {}
+        self.dirty = {}
+        self.highlight_styles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.save()
+        self.close()
+
+    def workbook(self, workbook_name):
+        """
+        Get a workbook, loading it the first time it is asked for.
+
+        :param workbook_name: Represents the name of the excel file.
+        :return: This will return the openpyxl Workbook.
+        """
+        if workbook_name not in self.workbooks:
+            log.info("Loading the workbook: %s", workbook_name)
+            self.workbooks[workbook_name] = openpyxl.load_workbook(workbook_name, read_only=self.read_only)
+        return self.workbooks[workbook_name]
+
+    def worksheet(self, workbook_name, sheet_name=None):
+        """
+        Get a worksheet of a workbook.
+
+        :param workbook_name: Represents the name of the excel file.
+        :param sheet_name: Represents the name of the sheet, the active sheet is used if it is not given.
+        :return: This will return the openpyxl Worksheet.
+        """
+        wb = self.workbook(workbook_name)
+        return wb[sheet_name] if sheet_name is not None else wb.active
+
+    def styles(self, workbook_name):
+        """
+        Get the highlight styles of a workbook, so each color is only registered once however many times it is used.
+
+        :param workbook_name: Represents the name of the excel file.
+        :return: This will return the HighlightStyles of the workbook.
+        """
+        if workbook_name not in self.highlight_styles:
+            self.highlight_styles[workbook_name] = HighlightStyles(self.workbook(workbook_name))
+        return self.highlight_styles[workbook_name]
+
+    def mark_dirty(self, workbook_name, save_as=None):
+        """
+        Remember that a workbook was changed and needs to be saved.
+
+        :param workbook_name: Represents the name of the excel file that was changed.
+        :param save_as: Represents the name the workbook gets saved as, the same file is used if it is not given.
+        """
+        if self.read_only:
+            raise ValueError("The workbook " + workbook_name + " was opened in read only mode and can not be saved")
+        self.dirty[workbook_name] = save_as or workbook_name
+
+    def save(self):
+        """
+        Save every dirty workbook once.
+
+        :return: This will return a list of the file names that were saved.
+        """
+        saved = []
+        for workbook_name, save_as in self.dirty.items():
+            self.workbooks[workbook_name].save(save_as)
+            log.info("Saved the %s workbook as: %s", workbook_name, save_as)
+            saved.append(save_as)
+        self.dirty.clear()
+        return saved
+
+    def close(self):
+        """
+        Close every workbook of the session. Read only workbooks keep their file open until they are closed.
+        """
+        for wb in self.workbooks.values():
+            if self.read_only:
+                wb.close()
+        self.workbooks.clear()
+        self.dirty.clear()
+        self.highlight_styles.clear()